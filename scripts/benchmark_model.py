@@ -0,0 +1,76 @@
+
+import subprocess
+import sys
+import time
+import os
+
+import numpy as np
+import pandas as pd
+from catboost import CatBoostRegressor
+
+from compiled_model import CompiledModel
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '../data')
+MODELS_DIR = os.path.join(os.path.dirname(__file__), '../models')
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_FILE = os.path.join(DATA_DIR, 'training_data.parquet')
+MODEL_PATH = os.path.join(MODELS_DIR, 'catboost_model.cbm')
+COMPILED_PATH = os.path.join(MODELS_DIR, 'catboost_model.npz')
+
+N_ROWS = 200
+N_IMPORT_RUNS = 3
+
+def time_import(statement):
+    # Fresh interpreter each run so nothing is already cached in sys.modules
+    timings = []
+    for _ in range(N_IMPORT_RUNS):
+        code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+        output = subprocess.run([sys.executable, '-c', code], cwd=SCRIPTS_DIR, capture_output=True, text=True, check=True)
+        timings.append(float(output.stdout.strip()))
+    return min(timings)
+
+def time_rows(predict, rows):
+    start = time.perf_counter()
+    for row in rows:
+        predict(row)
+    return (time.perf_counter() - start) / len(rows)
+
+def main():
+    for path in (INPUT_FILE, MODEL_PATH, COMPILED_PATH):
+        if not os.path.exists(path):
+            print(f"{path} not found. Please run train_model.py first.")
+            return
+
+    print("--- Import + Load Time (fresh interpreter, best of 3) ---")
+    catboost_import = time_import(
+        f"import pandas; from catboost import CatBoostRegressor; CatBoostRegressor().load_model({MODEL_PATH!r})"
+    )
+    compiled_import = time_import(
+        f"from compiled_model import CompiledModel; CompiledModel.load({COMPILED_PATH!r})"
+    )
+    print(f"CatBoost + pandas: {catboost_import * 1000:8.1f} ms")
+    print(f"Compiled (NumPy):  {compiled_import * 1000:8.1f} ms")
+
+    model = CatBoostRegressor(logging_level='Silent')
+    model.load_model(MODEL_PATH)
+    compiled = CompiledModel.load(COMPILED_PATH)
+
+    df = pd.read_parquet(INPUT_FILE)
+    sample = df[compiled.feature_names].sample(N_ROWS, random_state=42)
+    for col in compiled.cat_feature_names:
+        sample[col] = sample[col].astype(str)
+    sample = sample[model.feature_names_]
+    rows = sample.to_dict('records')
+
+    # Same work the dashboard does per estimate: one-row DataFrame for CatBoost, plain dict for the compiled model
+    print(f"\n--- Per-Row Latency (mean over {N_ROWS} rows) ---")
+    catboost_latency = time_rows(lambda row: model.predict(pd.DataFrame([row]))[0], rows)
+    compiled_latency = time_rows(lambda row: compiled.predict(row)[0], rows)
+    print(f"CatBoost (1-row DataFrame): {catboost_latency * 1e6:8.1f} us")
+    print(f"Compiled (dict):            {compiled_latency * 1e6:8.1f} us")
+
+    max_diff = np.abs(model.predict(sample) - compiled.predict(sample)).max()
+    print(f"\nMax abs difference on sample: ${max_diff:.6f}")
+
+if __name__ == "__main__":
+    main()
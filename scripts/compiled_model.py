@@ -0,0 +1,329 @@
+"""
+Dependency-light CatBoost evaluator.
+
+`compile_model` flattens a CatBoost JSON export (``save_model(..., format='json', pool=...)``)
+into a handful of NumPy arrays stored in a single ``.npz`` file. `CompiledModel` evaluates
+that artifact with NumPy only, so serving an estimate does not need catboost or pandas.
+
+Inputs can be a single row as a plain dict, a list of row dicts, or columnar data
+(a dict of arrays/lists, or anything indexable by column name such as a DataFrame).
+"""
+import json
+import numpy as np
+
+MAGIC_MULT = 0x4906ba494954cb65
+UINT64_MASK = 0xffffffffffffffff
+EMPTY_BUCKET = UINT64_MASK
+
+# Binary feature kinds (one per split candidate, in CatBoost's split_index order)
+BIN_FLOAT, BIN_ONE_HOT, BIN_CTR = 0, 1, 2
+# Elements of a CTR projection (PAD marks unused slots of shorter projections)
+ELEM_PAD, ELEM_CAT, ELEM_FLOAT, ELEM_EXACT = -1, 0, 1, 2
+# Supported CTR types
+CTR_BORDERS, CTR_BUCKETS, CTR_COUNTER = 0, 1, 2
+CTR_TYPES = {'Borders': CTR_BORDERS, 'Buckets': CTR_BUCKETS, 'Counter': CTR_COUNTER, 'FeatureFreq': CTR_COUNTER}
+# NaN handling of float features
+NAN_AS_IS, NAN_AS_FALSE, NAN_AS_TRUE = 0, 1, 2
+NAN_TREATMENT = {'AsIs': NAN_AS_IS, 'AsFalse': NAN_AS_FALSE, 'AsTrue': NAN_AS_TRUE}
+
+BATCH_SIZE = 1024
+
+
+def _calc_hash(a, b):
+    # Same mixing function CatBoost uses to hash CTR projections
+    return (MAGIC_MULT * ((a + MAGIC_MULT * b) & UINT64_MASK)) & UINT64_MASK
+
+
+def _hash_to_uint64(value):
+    # CatBoost stores categorical hashes as int32 and sign-extends them when hashing projections
+    value = int(value) & 0xffffffff
+    if value >= 0x80000000:
+        value |= 0xffffffff00000000
+    return value
+
+
+def compile_model(json_path, output_path):
+    """Convert a CatBoost JSON model export into a flat `.npz` artifact."""
+    with open(json_path) as f:
+        model = json.load(f)
+
+    if 'oblivious_trees' not in model:
+        raise ValueError("Only symmetric (oblivious) CatBoost trees can be compiled.")
+
+    features_info = model['features_info']
+    float_features = features_info.get('float_features', [])
+    cat_features = features_info.get('categorical_features', [])
+    ctrs = features_info.get('ctrs', [])
+
+    # --- Categorical value -> hash lookup (values come from the pool passed at export) ---
+    # The hash table is shared by all categorical features, so it is stored once
+    cat_features_hash = features_info.get('cat_features_hash', [])
+    cat_value_names = [entry['value'] for entry in cat_features_hash]
+    cat_value_hashes = [_hash_to_uint64(entry['hash']) for entry in cat_features_hash]
+
+    # --- Binary features, in the same order as CatBoost's split_index ---
+    bin_kind, bin_feature, bin_border, bin_value = [], [], [], []
+    for feature in float_features:
+        for border in feature['borders']:
+            bin_kind.append(BIN_FLOAT)
+            bin_feature.append(feature['feature_index'])
+            bin_border.append(border)
+            bin_value.append(0)
+    for feature in cat_features:
+        for value in feature.get('values', []):
+            bin_kind.append(BIN_ONE_HOT)
+            bin_feature.append(feature['feature_index'])
+            bin_border.append(0.0)
+            bin_value.append(_hash_to_uint64(value))
+    for ctr_index, ctr in enumerate(ctrs):
+        for border in ctr['borders']:
+            bin_kind.append(BIN_CTR)
+            bin_feature.append(ctr_index)
+            bin_border.append(border)
+            bin_value.append(0)
+
+    # --- CTRs: one learned count table per projection, shared by CTRs with different priors ---
+    table_ids = []
+    ctr_table, ctr_type, ctr_target_border, ctr_params = [], [], [], []
+    for ctr in ctrs:
+        if ctr['ctr_type'] not in CTR_TYPES:
+            raise ValueError(f"Unsupported CTR type: {ctr['ctr_type']}")
+        if ctr['identifier'] not in table_ids:
+            table_ids.append(ctr['identifier'])
+        ctr_table.append(table_ids.index(ctr['identifier']))
+        ctr_type.append(CTR_TYPES[ctr['ctr_type']])
+        ctr_target_border.append(ctr.get('target_border_idx', 0))
+        ctr_params.append([ctr['prior_numerator'], ctr['prior_denomerator'], ctr['shift'], ctr['scale']])
+
+    projections = [json.loads(table_id)['identifier'] for table_id in table_ids]
+    max_elements = max([len(p) for p in projections] or [0])
+    proj_kind = np.full((len(projections), max_elements), ELEM_PAD, dtype=np.int8)
+    proj_feature = np.zeros((len(projections), max_elements), dtype=np.int32)
+    proj_border = np.zeros((len(projections), max_elements), dtype=np.float32)
+    proj_value = np.zeros((len(projections), max_elements), dtype=np.uint64)
+    for t, projection in enumerate(projections):
+        for e, element in enumerate(projection):
+            kind = element['combination_element']
+            if kind == 'cat_feature_value':
+                proj_kind[t, e] = ELEM_CAT
+                proj_feature[t, e] = element['cat_feature_index']
+            elif kind == 'float_feature':
+                proj_kind[t, e] = ELEM_FLOAT
+                proj_feature[t, e] = element['float_feature_index']
+                proj_border[t, e] = element['border']
+            elif kind == 'cat_feature_exact_value':
+                proj_kind[t, e] = ELEM_EXACT
+                proj_feature[t, e] = element['cat_feature_index']
+                proj_value[t, e] = _hash_to_uint64(element['value'])
+            else:
+                raise ValueError(f"Unsupported CTR combination element: {kind}")
+
+    # All tables are merged into one sorted key array; each key is mixed with its table
+    # index so a single searchsorted resolves every projection at once.
+    ctr_data = model.get('ctr_data', {})
+    width = max([ctr_data[t]['hash_stride'] - 1 for t in table_ids] or [1])
+    entries = []
+    table_denominator = []
+    for t, table_id in enumerate(table_ids):
+        table = ctr_data[table_id]
+        stride = table['hash_stride']
+        hash_map = table['hash_map']
+        for i in range(0, len(hash_map), stride):
+            key = int(hash_map[i])
+            if key != EMPTY_BUCKET:
+                counts = hash_map[i + 1:i + stride]
+                entries.append((_calc_hash(key, t), counts + [0] * (width - len(counts))))
+        table_denominator.append(table.get('counter_denominator', 0))
+    entries.sort(key=lambda entry: entry[0])
+
+    # --- Trees: split_index per level and leaf values, flattened with offsets ---
+    split_offsets, splits, leaf_offsets, leaf_values = [0], [], [0], []
+    for tree in model['oblivious_trees']:
+        tree_splits = [split['split_index'] for split in tree['splits']]
+        if len(tree['leaf_values']) != 2 ** len(tree_splits):
+            raise ValueError("Only single-dimension (regression) models can be compiled.")
+        splits.extend(tree_splits)
+        leaf_values.extend(tree['leaf_values'])
+        split_offsets.append(len(splits))
+        leaf_offsets.append(len(leaf_values))
+
+    scale, bias = model.get('scale_and_bias', [1.0, [0.0]])
+    if isinstance(bias, list):
+        bias = bias[0] if bias else 0.0
+
+    np.savez(
+        output_path,
+        float_feature_names=np.array([f['feature_name'] for f in float_features], dtype=str),
+        float_nan_treatment=np.array([NAN_TREATMENT[f.get('nan_value_treatment', 'AsIs')] for f in float_features], dtype=np.int8),
+        cat_feature_names=np.array([f['feature_name'] for f in cat_features], dtype=str),
+        cat_value_names=np.array(cat_value_names, dtype=str),
+        cat_value_hashes=np.array(cat_value_hashes, dtype=np.uint64),
+        bin_kind=np.array(bin_kind, dtype=np.int8),
+        bin_feature=np.array(bin_feature, dtype=np.int32),
+        bin_border=np.array(bin_border, dtype=np.float32),
+        bin_value=np.array(bin_value, dtype=np.uint64),
+        ctr_table=np.array(ctr_table, dtype=np.int32),
+        ctr_type=np.array(ctr_type, dtype=np.int8),
+        ctr_target_border=np.array(ctr_target_border, dtype=np.int32),
+        ctr_params=np.array(ctr_params, dtype=np.float64).reshape(-1, 4),
+        proj_kind=proj_kind,
+        proj_feature=proj_feature,
+        proj_border=proj_border,
+        proj_value=proj_value,
+        table_denominator=np.array(table_denominator, dtype=np.float64),
+        ctr_keys=np.array([key for key, _ in entries], dtype=np.uint64),
+        ctr_counts=np.array([counts for _, counts in entries], dtype=np.float64).reshape(-1, width),
+        split_offsets=np.array(split_offsets, dtype=np.int64),
+        splits=np.array(splits, dtype=np.int32),
+        leaf_offsets=np.array(leaf_offsets, dtype=np.int64),
+        leaf_values=np.array(leaf_values, dtype=np.float64),
+        scale_and_bias=np.array([scale, bias], dtype=np.float64),
+    )
+
+
+class CompiledModel:
+    """NumPy-only evaluator for artifacts written by `compile_model`."""
+
+    def __init__(self, arrays):
+        self.float_feature_names = arrays['float_feature_names'].tolist()
+        self.cat_feature_names = arrays['cat_feature_names'].tolist()
+        self.feature_names = self.float_feature_names + self.cat_feature_names
+        self.float_nan_treatment = arrays['float_nan_treatment']
+        self.cat_hashes = dict(zip(arrays['cat_value_names'].tolist(), arrays['cat_value_hashes'].tolist()))
+
+        bin_kind = arrays['bin_kind']
+        bin_feature = arrays['bin_feature']
+        self.bin_count = len(bin_kind)
+        self.float_bins = np.flatnonzero(bin_kind == BIN_FLOAT)
+        self.float_bin_feature = bin_feature[self.float_bins]
+        self.float_bin_border = arrays['bin_border'][self.float_bins]
+        self.one_hot_bins = np.flatnonzero(bin_kind == BIN_ONE_HOT)
+        self.one_hot_bin_feature = bin_feature[self.one_hot_bins]
+        self.one_hot_bin_value = arrays['bin_value'][self.one_hot_bins]
+        self.ctr_bins = np.flatnonzero(bin_kind == BIN_CTR)
+        self.ctr_bin_feature = bin_feature[self.ctr_bins]
+        self.ctr_bin_border = arrays['bin_border'][self.ctr_bins]
+
+        self.ctr_table = arrays['ctr_table']
+        self.ctr_type = arrays['ctr_type']
+        self.ctr_target_border = arrays['ctr_target_border'][None, :, None]
+        self.ctr_prior_num, self.ctr_prior_denom, self.ctr_shift, self.ctr_scale = arrays['ctr_params'].T
+        self.ctr_denominator = arrays['table_denominator'][self.ctr_table]
+        self.ctr_keys = arrays['ctr_keys']
+        self.ctr_counts = arrays['ctr_counts']
+
+        self.proj_kind = arrays['proj_kind']
+        self.proj_feature = arrays['proj_feature']
+        self.proj_border = arrays['proj_border']
+        self.proj_value = arrays['proj_value']
+        self.table_index = np.arange(len(self.proj_kind), dtype=np.uint64)
+
+        # Pad every tree to the deepest one. Padding levels point at an always-false
+        # binary feature (index `bin_count`) so they never change the leaf index.
+        split_offsets = arrays['split_offsets']
+        depths = np.diff(split_offsets)
+        max_depth = int(depths.max()) if len(depths) else 0
+        self.tree_splits = np.full((len(depths), max_depth), self.bin_count, dtype=np.int32)
+        for t, depth in enumerate(depths):
+            self.tree_splits[t, :depth] = arrays['splits'][split_offsets[t]:split_offsets[t + 1]]
+        self.level_weights = (1 << np.arange(max_depth)).astype(np.int64)
+        self.leaf_offsets = arrays['leaf_offsets'][:-1]
+        self.leaf_values = arrays['leaf_values']
+        self.scale, self.bias = arrays['scale_and_bias']
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls({name: arrays[name] for name in arrays.files})
+
+    def predict(self, data):
+        """Predict for a row dict, a list of row dicts, or columnar data keyed by feature name."""
+        float_values, cat_hashes = self._prepare(data)
+        n_rows = len(float_values)
+        result = np.empty(n_rows, dtype=np.float64)
+        for start in range(0, n_rows, BATCH_SIZE):
+            stop = min(start + BATCH_SIZE, n_rows)
+            result[start:stop] = self._predict_batch(float_values[start:stop], cat_hashes[start:stop])
+        return result
+
+    def _prepare(self, data):
+        # Values unseen at export time get a hash that matches no CTR bucket or one-hot value
+        lookup = self.cat_hashes.get
+        if isinstance(data, dict) and all(np.ndim(data[name]) == 0 for name in self.feature_names):
+            data = [data]
+
+        if isinstance(data, list):
+            float_values = np.array(
+                [[row[name] for name in self.float_feature_names] for row in data], dtype=np.float32
+            ).reshape(len(data), len(self.float_feature_names))
+            cat_hashes = np.array(
+                [[lookup(str(row[name]), EMPTY_BUCKET) for name in self.cat_feature_names] for row in data],
+                dtype=np.uint64,
+            ).reshape(len(data), len(self.cat_feature_names))
+            return float_values, cat_hashes
+
+        n_rows = len(data[self.feature_names[0]])
+        float_values = np.empty((n_rows, len(self.float_feature_names)), dtype=np.float32)
+        for i, name in enumerate(self.float_feature_names):
+            float_values[:, i] = np.asarray(data[name], dtype=np.float32)
+        cat_hashes = np.empty((n_rows, len(self.cat_feature_names)), dtype=np.uint64)
+        for i, name in enumerate(self.cat_feature_names):
+            cat_hashes[:, i] = [lookup(str(v), EMPTY_BUCKET) for v in data[name]]
+        return float_values, cat_hashes
+
+    def _float_bits(self, float_values, features, borders):
+        values = float_values[:, features]
+        bits = values > borders
+        nans = np.isnan(values)
+        if nans.any():
+            bits = np.where(nans, self.float_nan_treatment[features] == NAN_AS_TRUE, bits)
+        return bits
+
+    def _ctr_values(self, float_values, cat_hashes):
+        # Hash every projection for every row: (rows, tables, elements)
+        cat_elements = cat_hashes[:, self.proj_feature * (self.proj_kind != ELEM_FLOAT)]
+        float_elements = self._float_bits(float_values, self.proj_feature * (self.proj_kind == ELEM_FLOAT), self.proj_border)
+        elements = np.where(self.proj_kind == ELEM_CAT, cat_elements, np.where(
+            self.proj_kind == ELEM_FLOAT, float_elements, cat_elements == self.proj_value
+        ).astype(np.uint64))
+
+        magic = np.uint64(MAGIC_MULT)
+        hashes = np.zeros(elements.shape[:2], dtype=np.uint64)
+        for e in range(elements.shape[2]):
+            mixed = magic * (hashes + magic * elements[:, :, e])
+            hashes = np.where(self.proj_kind[:, e] == ELEM_PAD, hashes, mixed)
+        hashes = magic * (hashes + magic * self.table_index)
+
+        index = np.minimum(np.searchsorted(self.ctr_keys, hashes), len(self.ctr_keys) - 1)
+        found = (self.ctr_keys[index] == hashes)[:, self.ctr_table]
+        counts = self.ctr_counts[index[:, self.ctr_table]]
+
+        # Learned statistics per CTR: (rows, ctrs)
+        total = counts.sum(axis=2)
+        cumulative = np.cumsum(counts, axis=2)
+        borders_good = total - np.take_along_axis(cumulative, self.ctr_target_border, axis=2)[:, :, 0]
+        buckets_good = np.take_along_axis(counts, self.ctr_target_border, axis=2)[:, :, 0]
+        good = np.select(
+            [self.ctr_type == CTR_BORDERS, self.ctr_type == CTR_BUCKETS], [borders_good, buckets_good], counts[:, :, 0]
+        )
+        is_counter = self.ctr_type == CTR_COUNTER
+        total = np.where(is_counter, self.ctr_denominator, total)
+        good = np.where(found, good, 0.0)
+        total = np.where(found | is_counter, total, 0.0)
+
+        ctr = (good + self.ctr_prior_num) / (total + self.ctr_prior_denom)
+        return ((ctr + self.ctr_shift) * self.ctr_scale).astype(np.float32)
+
+    def _predict_batch(self, float_values, cat_hashes):
+        n_rows = len(float_values)
+        bits = np.zeros((n_rows, self.bin_count + 1), dtype=bool)
+        bits[:, self.float_bins] = self._float_bits(float_values, self.float_bin_feature, self.float_bin_border)
+        if len(self.one_hot_bins):
+            bits[:, self.one_hot_bins] = cat_hashes[:, self.one_hot_bin_feature] == self.one_hot_bin_value
+        if len(self.ctr_bins):
+            ctr_values = self._ctr_values(float_values, cat_hashes)
+            bits[:, self.ctr_bins] = ctr_values[:, self.ctr_bin_feature] > self.ctr_bin_border
+
+        leaf_index = bits[:, self.tree_splits] @ self.level_weights
+        leaves = self.leaf_values[self.leaf_offsets + leaf_index]
+        return self.scale * leaves.sum(axis=1) + self.bias
@@ -6,6 +6,8 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import os
 
+from compiled_model import compile_model, CompiledModel
+
 DATA_DIR = os.path.join(os.path.dirname(__file__), '../data')
 MODELS_DIR = os.path.join(os.path.dirname(__file__), '../models')
 INPUT_FILE = os.path.join(DATA_DIR, 'training_data.parquet')
@@ -84,6 +86,20 @@ def main():
     model_path = os.path.join(MODELS_DIR, 'catboost_model.cbm')
     print(f"\nSaving model to {model_path}...")
     model.save_model(model_path)
+
+    # --- Compiled Artifact (NumPy-only inference) ---
+    # JSON export needs the pool so categorical string values are stored alongside their hashes.
+    json_path = os.path.join(MODELS_DIR, 'catboost_model.json')
+    compiled_path = os.path.join(MODELS_DIR, 'catboost_model.npz')
+    print(f"Exporting compiled model to {compiled_path}...")
+    model.save_model(json_path, format='json', pool=Pool(X, y, cat_features=cat_indices))
+    compile_model(json_path, compiled_path)
+
+    compiled_predictions = CompiledModel.load(compiled_path).predict(X_test)
+    max_diff = np.abs(compiled_predictions - predictions).max()
+    print(f"Compiled model max abs difference vs CatBoost: ${max_diff:.6f}")
+    if not np.allclose(compiled_predictions, predictions, rtol=1e-6, atol=1e-3):
+        raise RuntimeError("Compiled model predictions do not match CatBoost.")
     print("Training Complete.")
 
 if __name__ == "__main__":